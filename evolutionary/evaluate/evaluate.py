@@ -1,56 +1,189 @@
+import warnings
+from copy import deepcopy
+from functools import partial
+
 import torch
+import numpy as np
 
 from pysnn.network import SNNNetwork
 
-from evolutionary.utils.utils import randomize_env
+from evolutionary.network.ann import ANN, BatchedANN
+from evolutionary.utils.constructors import build_network, build_environment
+from evolutionary.utils.utils import (
+    randomize_env,
+    getset_env,
+    flatten_parameters,
+    unflatten_parameters,
+)
+
+# Everything needed for evaluation that doesn't change between evaluations,
+# set up once per worker by init_worker()
+_worker = {}
 
 
 def evaluate(valid_objectives, config, envs, h0, individual):
     # Keep track of all possible objectives
     objectives = {obj: 0.0 for obj in valid_objectives}
 
+    # Neurons to count spikes of (none for ANNs), determined once here instead of
+    # checking network type and hidden layer every step
+    network = individual[0]
+    snn = isinstance(network, SNNNetwork)
+    neurons = (
+        [n for n in [network.neuron1, network.neuron2] if n is not None] if snn else []
+    )
+
     for h, env in zip(h0, envs):
-        # Reset network and env
-        if isinstance(individual[0], SNNNetwork):
-            individual[0].reset_state()
-        obs = env.reset(h0=h)
-        done = False
-        spikes = 0
-
-        while not done:
-            # Step the environment
-            obs = torch.from_numpy(obs)
-            action = individual[0].forward(obs.view(1, 1, -1))
-            action = action.numpy()
-            obs, _, done, _ = env.step(action)
-            # Increment number of spikes each step
-            if isinstance(individual[0], SNNNetwork):
-                spikes += (
-                    individual[0].neuron1.spikes.sum().item()
-                    + individual[0].neuron2.spikes.sum().item()
-                    if individual[0].neuron1 is not None
-                    else individual[0].neuron2.spikes.sum().item()
-                )
+        # No autograd needed, so skip its bookkeeping altogether
+        # This has to be done here (and not around the map in main), because
+        # evaluation happens in worker processes
+        with torch.inference_mode():
+            # Reset network and env
+            if snn:
+                network.reset_state()
+            obs = env.reset(h0=h)
+            done = False
+            spikes = 0
+
+            while not done:
+                # Step the environment
+                obs = torch.from_numpy(obs)
+                action = network.forward(obs.view(1, 1, -1))
+                action = action.numpy()
+                obs, _, done, _ = env.step(action)
+                # Increment number of spikes each step
+                # Kept as tensor, to prevent a conversion to Python every step
+                for neuron in neurons:
+                    spikes += neuron.spikes.sum()
 
         # Increment other scores
-        # Time to land, final height and final velocity
-        if env.t >= env.max_t or env.state[0] >= env.MAX_H:
-            objectives["time to land"] += 100.0
-            objectives["time to land scaled"] += 100.0
-            objectives["final velocity"] += 10.0
-            objectives["final velocity squared"] += 10.0
-            objectives["final height"] += 10.0
-        else:
-            objectives["time to land"] += env.t - config["env"]["settle"]
-            objectives["time to land scaled"] += (env.t - config["env"]["settle"]) / h
-            objectives["final velocity"] += abs(env.state[1])
-            objectives["final velocity squared"] += env.state[1] ** 2
-            objectives["final height"] += env.state[0]
-
-        # Spikes divided by real time to land, because we don't want to overly stimulate
-        # too fast landings
-        objectives["spikes"] += spikes / (env.t - config["env"]["settle"])
+        _score(objectives, config, env, h, float(spikes))
 
     # Select appropriate objectives
     # List, so order is guaranteed
     return [objectives[obj] / len(h0) for obj in config["evo"]["objectives"]]
+
+
+def init_worker(valid_objectives, config):
+    # Config, network and environments are sent to each worker only once,
+    # instead of with every evaluation
+    _worker["valid objectives"] = valid_objectives
+    _worker["config"] = config
+    # The architecture is fixed, so the network can be specialized with TorchScript
+    # to cut per-step overhead (ANN only, PySNN networks aren't scriptable)
+    # Not frozen, because parameters are loaded into it for each evaluation
+    # Newer PyTorch deprecates TorchScript with a FutureWarning, which would be
+    # printed by every worker, so only that warning is silenced
+    network = build_network(config)
+    if isinstance(network, ANN):
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore", message=".*torch.jit.script.*", category=FutureWarning
+            )
+            network = torch.jit.script(network)
+    _worker["network"] = network
+    _worker["envs"] = [build_environment(config) for _ in config["env"]["h0"]]
+
+
+def evaluate_population(map, envs, population):
+    # Individuals are sent to the workers as rows of a single parameter array,
+    # which is much cheaper to pickle than complete networks
+    # Likewise, only the randomized settings of the environments are sent
+    parameters = np.stack([flatten_parameters(ind[0]) for ind in population])
+    settings = [getset_env(env) for env in envs]
+    return map(partial(evaluate_parameters, settings), parameters)
+
+
+def evaluate_parameters(settings, parameters):
+    # Apply this generation's randomization to the worker's environments
+    # Only when it changes, because this also re-seeds them: between individuals
+    # in a generation, the environments' random state keeps running, so not all
+    # individuals get the same noise (which would give identically-performing
+    # agents, see main())
+    if _worker.get("settings") != settings:
+        for env, setting in zip(_worker["envs"], settings):
+            getset_env(env, setting).checks()
+        _worker["settings"] = settings
+
+    # Load parameters into the worker's network and evaluate that
+    # Its state was created during earlier evaluations in inference mode,
+    # so it can only be updated in inference mode
+    with torch.inference_mode():
+        unflatten_parameters(_worker["network"], parameters)
+    return evaluate(
+        _worker["valid objectives"],
+        _worker["config"],
+        _worker["envs"],
+        _worker["config"]["env"]["h0"],
+        [_worker["network"]],
+    )
+
+
+def evaluate_batch(valid_objectives, config, envs, h0, population, device="cpu"):
+    # Evaluate all (ANN) individuals at once: their networks are stacked into a
+    # single batched network, and each gets its own copy of the environments,
+    # which are stepped in lockstep
+    # Network can be evaluated in lower precision (e.g. bfloat16), which doesn't
+    # affect the individuals themselves, since stacking copies their parameters
+    dtype = getattr(torch, config["evo"].get("dtype", "float32"))
+    network = BatchedANN(
+        [ind[0] for ind in population], compile=config["evo"].get("compile", False)
+    ).to(device, dtype)
+
+    # Keep track of all possible objectives, for each individual
+    objectives = [{obj: 0.0 for obj in valid_objectives} for _ in population]
+
+    for h, env in zip(h0, envs):
+        # Copy and reset env for each individual
+        # Copies share their random state, so give each its own seed (offset from
+        # this generation's) to prevent all individuals from getting the same noise
+        # (which would give identically-performing agents, see main())
+        batch_envs = [deepcopy(env) for _ in population]
+        for i, e in enumerate(batch_envs):
+            e.seed(env.seeds + i)
+        obs = np.stack([e.reset(h0=h) for e in batch_envs])
+        done = np.zeros(len(population), dtype=bool)
+
+        # No autograd needed, so skip its bookkeeping altogether
+        with torch.inference_mode():
+            while not done.all():
+                # Compute actions for all individuals in one go
+                # Shape stays fixed (also for those that are done), so a compiled
+                # forward pass doesn't have to be recompiled
+                x = torch.as_tensor(obs, dtype=dtype, device=device)
+                actions = network.forward(x.view(len(population), 1, -1))
+                actions = actions.float().cpu().numpy()
+
+                # Only step environments that aren't done yet
+                for i in np.flatnonzero(~done):
+                    obs[i], _, done[i], _ = batch_envs[i].step(actions[i : i + 1])
+
+        # Increment other scores
+        for obj, e in zip(objectives, batch_envs):
+            _score(obj, config, e, h, 0)
+
+    # Select appropriate objectives
+    # List, so order is guaranteed
+    return [
+        [obj[o] / len(h0) for o in config["evo"]["objectives"]] for obj in objectives
+    ]
+
+
+def _score(objectives, config, env, h, spikes):
+    # Time to land, final height and final velocity
+    if env.t >= env.max_t or env.state[0] >= env.MAX_H:
+        objectives["time to land"] += 100.0
+        objectives["time to land scaled"] += 100.0
+        objectives["final velocity"] += 10.0
+        objectives["final velocity squared"] += 10.0
+        objectives["final height"] += 10.0
+    else:
+        objectives["time to land"] += env.t - config["env"]["settle"]
+        objectives["time to land scaled"] += (env.t - config["env"]["settle"]) / h
+        objectives["final velocity"] += abs(env.state[1])
+        objectives["final velocity squared"] += env.state[1] ** 2
+        objectives["final height"] += env.state[0]
+
+    # Spikes divided by real time to land, because we don't want to overly stimulate
+    # too fast landings
+    objectives["spikes"] += spikes / (env.t - config["env"]["settle"])
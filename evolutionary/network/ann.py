@@ -36,6 +36,8 @@ class ANN(nn.Module):
             return x
         elif self.encoding == "divergence":
             return x[..., 0]
+        else:
+            raise ValueError("Invalid encoding")
 
     def mutate(self, genes, types, mutation_rate=1.0):
         # Go over all genes that have to be mutated
@@ -64,3 +66,53 @@ class ANN(nn.Module):
                         torch.rand_like(param) < mutation_rate
                     ).float()
                     param.clamp_(-3.0, 3.0)
+
+
+class BatchedANN(nn.Module):
+    def __init__(self, networks, compile=False):
+        super(BatchedANN, self).__init__()
+
+        # All networks share the same architecture and encoding
+        self.encoding = networks[0].encoding
+
+        # Stack weights and biases of all networks along a batch dimension,
+        # such that all networks can be evaluated with a single batched matmul
+        # Weights: (N, in, out), biases: (N, 1, out)
+        self.register_buffer(
+            "w1", torch.stack([net.fc1.weight.t() for net in networks])
+        )
+        self.register_buffer(
+            "b1", torch.stack([net.fc1.bias.view(1, -1) for net in networks])
+        )
+        self.register_buffer(
+            "w2", torch.stack([net.fc2.weight.t() for net in networks])
+        )
+        self.register_buffer(
+            "b2", torch.stack([net.fc2.bias.view(1, -1) for net in networks])
+        )
+
+        # Optionally JIT-compile the forward pass (fuses ops and removes Python
+        # overhead), only available from PyTorch 2.0 onwards
+        # Compiled graphs are cached per shape, so they're reused across batches
+        if compile and hasattr(torch, "compile"):
+            self._forward = torch.compile(_batched_forward, dynamic=False)
+        else:
+            self._forward = _batched_forward
+
+    def forward(self, x):
+        # x has shape (N, 1, inputs), output has shape (N, 1, 1)
+        x = self._encode(x)
+        return self._forward(x, self.w1, self.b1, self.w2, self.b2)
+
+    def _encode(self, x):
+        if self.encoding == "both":
+            return x
+        elif self.encoding == "divergence":
+            return x[..., :1]
+        else:
+            raise ValueError("Invalid encoding")
+
+
+def _batched_forward(x, w1, b1, w2, b2):
+    x = F.relu(torch.baddbmm(b1, x, w1))
+    return torch.baddbmm(b2, x, w2)
@@ -77,6 +77,10 @@ class SNN(SNNNetwork):
             ).view(1, 1, config["net"]["input size"])
 
         self.out_bounds = config["env"]["g bounds"]
+        # Tensors used for decoding, created once here instead of every step
+        # Plain attributes (not buffers), so they don't end up in the state dict
+        self.out_bounds_tensor = torch.tensor(self.out_bounds)
+        self.out_weights = torch.linspace(self.out_bounds[0], -self.out_bounds[0], 5)
 
         # Input/output layer size (related to encoding/decoding)
         if self.encoding == "both":
@@ -293,20 +297,18 @@ class SNN(SNNNetwork):
         # Maximum of two traces
         elif self.decoding == "max trace":
             trace = out_trace.view(-1)
-            output = trace * torch.tensor(self.out_bounds)
+            output = trace * self.out_bounds_tensor
             return output[trace.argmax()].view(-1)
         # Sum of two traces (one for positive, one for negative)
         elif self.decoding == "sum trace":
             trace = out_trace.view(-1)
-            output = (trace - trace.flip(0)).abs() * torch.tensor(self.out_bounds)
+            output = (trace - trace.flip(0)).abs() * self.out_bounds_tensor
             return output[trace.argmax()].view(-1)
         # Weighted average of five traces
         elif self.decoding == "weighted trace":
             trace = out_trace.view(-1)
             if trace.sum() > 0.0:
-                output = (
-                    trace * torch.linspace(self.out_bounds[0], -self.out_bounds[0], 5)
-                ).sum() / trace.sum()
+                output = (trace * self.out_weights).sum() / trace.sum()
                 return output.view(-1)
             else:
                 return torch.tensor([0.0])
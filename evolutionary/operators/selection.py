@@ -0,0 +1,72 @@
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+
+def select_nsga2(individuals, k):
+    # Same as DEAP's selNSGA2(), but with vectorized sorting and crowding distance
+    fronts = sort_nondominated(individuals, k)
+    for front in fronts:
+        assign_crowding_dist(front)
+
+    # Take complete fronts, and fill up with the least crowded of the last front
+    chosen = list(chain.from_iterable(fronts[:-1]))
+    k = k - len(chosen)
+    if k > 0:
+        last = sorted(fronts[-1], key=attrgetter("fitness.crowding_dist"), reverse=True)
+        chosen.extend(last[:k])
+
+    return chosen
+
+
+def sort_nondominated(individuals, k):
+    # Same as DEAP's sortNondominated(): sort into fronts until at least k
+    # individuals are sorted, but with dominance computed for all pairs at once
+    if k == 0:
+        return []
+
+    # Weighted values, so higher is always better
+    # dominates[i, j]: i is at least as good as j for all objectives and better for one
+    fitnesses = np.array([ind.fitness.wvalues for ind in individuals])
+    dominates = (fitnesses[:, None, :] >= fitnesses[None, :, :]).all(-1) & (
+        fitnesses[:, None, :] > fitnesses[None, :, :]
+    ).any(-1)
+
+    # Peel off fronts: individuals not dominated by any remaining individual
+    dominated_by = dominates.sum(0)
+    remaining = np.ones(len(individuals), dtype=bool)
+    fronts = []
+    n_sorted = 0
+    while n_sorted < min(len(individuals), k):
+        front = np.flatnonzero(remaining & (dominated_by == 0))
+        remaining[front] = False
+        dominated_by -= dominates[front].sum(0)
+        fronts.append([individuals[i] for i in front])
+        n_sorted += len(front)
+
+    return fronts
+
+
+def assign_crowding_dist(individuals):
+    # Same as DEAP's assignCrowdingDist(), but vectorized over individuals
+    if len(individuals) == 0:
+        return
+
+    fitnesses = np.array([ind.fitness.values for ind in individuals])
+    nobj = fitnesses.shape[1]
+    distances = np.zeros(len(individuals))
+
+    # Extremes get infinite distance, others the (normalized) distance between
+    # their neighbours, summed over objectives
+    order = np.argsort(fitnesses, axis=0, kind="stable")
+    for i in range(nobj):
+        values = fitnesses[order[:, i], i]
+        distances[order[[0, -1], i]] = np.inf
+        if values[-1] == values[0]:
+            continue
+        norm = nobj * (values[-1] - values[0])
+        distances[order[1:-1, i]] += (values[2:] - values[:-2]) / norm
+
+    for ind, dist in zip(individuals, distances):
+        ind.fitness.crowding_dist = dist
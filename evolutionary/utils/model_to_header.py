@@ -3,13 +3,14 @@ import torch
 from pysnn.neuron import AdaptiveLIFNeuron
 
 from evolutionary.utils.constructors import build_network
+from evolutionary.utils.utils import load_parameters
 
 
 def model_to_header(config, in_file, verbose=2):
     # Build network
     network = build_network(config)
     # Load network parameters
-    network.load_state_dict(torch.load(in_file))
+    network.load_state_dict(load_parameters(in_file))
 
     if verbose:
         if network.neuron1 is not None:
@@ -1,17 +1,83 @@
+from pathlib import Path
+
 import torch
+import yaml
 import numpy as np
 
 
-def randomize_env(env, config):
+# Generator for environment randomization, faster than the legacy global RandomState
+_RNG = np.random.default_rng()
+
+# Environment parameters that are randomized between bounds, in order of sampling
+RANDOMIZED_ENV = ["delay", "noise", "noise p", "thrust tc", "dt", "ds act", "jitter"]
+
+# Parameters of a group of individuals (e.g. hall of fame) are combined in this file
+PARAMETERS_FILE = "parameters.net"
+
+
+def load_config(path):
+    # Use the much faster libyaml-based loader if PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.FullLoader)
+    with open(path, "r") as cf:
+        return yaml.load(cf, Loader=loader)
+
+
+def get_device():
+    # Prefer CUDA, then Apple's MPS, else fall back to CPU
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
+        return torch.device("mps")
+    else:
+        return torch.device("cpu")
+
+
+def clone_individual(network, individual):
+    # Cheaper than a deepcopy: build a fresh network and copy the state over
+    clone = type(individual)([network()])
+    clone[0].load_state_dict(individual[0].state_dict())
+    if individual.fitness.valid:
+        clone.fitness.values = individual.fitness.values
+    return clone
+
+
+def flatten_parameters(network):
+    # Complete state of a network as a single flat float32 array
+    return (
+        torch.cat([v.reshape(-1).float() for v in network.state_dict().values()])
+        .detach()
+        .numpy()
+    )
+
+
+def unflatten_parameters(network, parameters):
+    # Load a flat array (see flatten_parameters()) back into a network, in-place
+    offset = 0
+    for v in network.state_dict().values():
+        v.copy_(torch.from_numpy(parameters[offset : offset + v.numel()]).view_as(v))
+        offset += v.numel()
+    return network
+
+
+def randomize_env(env, config, rng=None):
     # Randomize delay, noise, proportional noise, thrust time constant, dt, computational jitter and seed
-    env.delay = np.random.randint(*config["env"]["delay"])
-    env.noise_std = np.random.uniform(*config["env"]["noise"])
-    env.noise_p_std = np.random.uniform(*config["env"]["noise p"])
-    env.thrust_tc = np.random.uniform(*config["env"]["thrust tc"])
-    env.dt = np.random.uniform(*config["env"]["dt"])
-    env.ds_act = np.random.randint(*config["env"]["ds act"])
-    env.jitter_prob = np.random.uniform(*config["env"]["jitter"])
-    env.seed(np.random.randint(config["env"]["seeds"]))
+    # Use own generator if given, else the module-level one
+    rng = _RNG if rng is None else rng
+    # All in a single draw, with each uniform sample scaled to its own bounds
+    # Integers are floored, so upper bounds are exclusive (like np.random.randint)
+    lower = np.array([config["env"][key][0] for key in RANDOMIZED_ENV] + [0])
+    upper = np.array(
+        [config["env"][key][1] for key in RANDOMIZED_ENV] + [config["env"]["seeds"]]
+    )
+    sample = lower + rng.random(len(RANDOMIZED_ENV) + 1) * (upper - lower)
+    env.delay = int(sample[0])
+    env.noise_std = sample[1]
+    env.noise_p_std = sample[2]
+    env.thrust_tc = sample[3]
+    env.dt = sample[4]
+    env.ds_act = int(sample[5])
+    env.jitter_prob = sample[6]
+    env.seed(int(sample[7]))
 
     # And check values again
     env.checks()
@@ -44,6 +110,62 @@ def getset_env(env, config=None):
         return config
 
 
+def copy_state(network):
+    # Copy of the state dict on CPU, which shares no memory with the network
+    return {k: v.detach().cpu().clone() for k, v in network.state_dict().items()}
+
+
+def save_parameters(states, folder):
+    # Save state dicts of all individuals to a single file instead of a file each,
+    # keyed by the file name they would have had
+    torch.save(
+        {f"individual_{i:03}.net": state for i, state in enumerate(states)},
+        Path(folder) / PARAMETERS_FILE,
+    )
+
+
+def load_parameters(parameters):
+    # Parameters of an individual are either in their own file, or part of a
+    # combined file in the same folder
+    parameters = Path(parameters)
+    if not parameters.exists() and (parameters.parent / PARAMETERS_FILE).exists():
+        return torch.load(parameters.parent / PARAMETERS_FILE)[parameters.name]
+    return torch.load(parameters)
+
+
+def find_parameters(folder):
+    # Expand to all parameter files, with combined files expanded to their
+    # individuals, and load them (each file only once)
+    # Returns sorted locations and the corresponding state dicts
+    found = []
+    for file in Path(folder).rglob("*.net"):
+        if file.name == PARAMETERS_FILE:
+            found.extend(
+                (file.parent / name, state) for name, state in torch.load(file).items()
+            )
+        else:
+            found.append((file, torch.load(file)))
+    found.sort(key=lambda f: f[0])
+    return [f[0] for f in found], [f[1] for f in found]
+
+
+def fitness_stats(population):
+    # All statistics from a single fitness array, instead of collecting the
+    # fitnesses again for each statistic
+    fitnesses = np.array([ind.fitness.values for ind in population])
+    # Median only needs a partial sort (middle two are the same for odd sizes)
+    lower, upper = (fitnesses.shape[0] - 1) // 2, fitnesses.shape[0] // 2
+    part = np.partition(fitnesses, [lower, upper], axis=0)
+    median = (part[lower] + part[upper]) / 2
+    return {
+        "avg": fitnesses.mean(0),
+        "median": median,
+        "std": fitnesses.std(0),
+        "min": fitnesses.min(0),
+        "max": fitnesses.max(0),
+    }
+
+
 def is_pareto_efficient(costs):
     is_efficient = np.ones(costs.shape[0], dtype=np.bool)
     for i, c in enumerate(costs):
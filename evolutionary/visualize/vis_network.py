@@ -1,17 +1,17 @@
 from collections import OrderedDict
 
-import torch
 import yaml
 import matplotlib.pyplot as plt
 
 from evolutionary.utils.constructors import build_network
+from evolutionary.utils.utils import load_parameters
 from evolutionary.visualize.colormap import parula_map
 
 
 def vis_network(config, parameters, verbose=2):
     # Load network
     network = build_network(config)
-    network.load_state_dict(torch.load(parameters))
+    network.load_state_dict(load_parameters(parameters))
 
     # Get parameters that are more suited to be printed in text
     print_params = {"evolved": {}, "fixed": {}}
@@ -8,7 +8,7 @@ from pysnn.neuron import BaseNeuron
 from pysnn.network import SNNNetwork
 
 from evolutionary.utils.constructors import build_network, build_environment
-from evolutionary.utils.utils import randomize_env
+from evolutionary.utils.utils import randomize_env, load_parameters
 
 
 def vis_performance(config, parameters, verbose=2):
@@ -17,7 +17,7 @@ def vis_performance(config, parameters, verbose=2):
 
     # Load network
     network = build_network(config)
-    network.load_state_dict(torch.load(parameters))
+    network.load_state_dict(load_parameters(parameters))
 
     # Go over all heights we trained for
     for h in config["env"]["h0"]:
@@ -153,7 +153,7 @@ def vis_disturbance(config, parameters, verbose=2):
 
     # Load network
     network = build_network(config)
-    network.load_state_dict(torch.load(parameters))
+    network.load_state_dict(load_parameters(parameters))
 
     # Reset network and env
     if isinstance(network, SNNNetwork):
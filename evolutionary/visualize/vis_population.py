@@ -30,57 +30,67 @@ def vis_relevant(population, hof, obj_labels, plot_obj, last=None, verbose=2):
     fitnesses = fitnesses[mask]
     fitnesses_hof = fitnesses_hof[mask_hof]
 
-    # Create figure and axis if not there, else unpack or leave
-    # We had no figure and want one
+    # Create figure, axis and (still empty) plots if not there, else unpack
+    # After that, only the plotted data is updated, instead of clearing the axis
+    # and redrawing everything each generation
     if last is None:
         plt.ion()
-        fig, ax = plt.subplots(1, 1, dpi=200)
+        # Layout is redone on every draw, so it keeps up with the changing limits
+        fig, ax = plt.subplots(1, 1, dpi=200, constrained_layout=True)
+        artists = (ax.scatter([], []), ax.scatter([], []), [])
+
+        # Decorate figure
+        ax.set_xlabel(obj_labels[plot_obj[0]])
+        ax.set_ylabel(obj_labels[plot_obj[1]])
+        ax.grid()
     # We had a figure
     else:
-        fig, ax, _ = last
+        fig, ax, _, artists = last
 
     # We (still) don't have anything to plot
     if fitnesses.size == 0 and fitnesses_hof.size == 0:
-        return fig, ax, False
+        return fig, ax, False, artists
 
-    # Clear axis
-    ax.cla()
-
-    # Plot the fitnesses
-    if fitnesses.size > 0:
-        ax.scatter(fitnesses[:, plot_obj[0]], fitnesses[:, plot_obj[1]])
-    if fitnesses_hof.size > 0:
-        ax.scatter(fitnesses_hof[:, plot_obj[0]], fitnesses_hof[:, plot_obj[1]])
+    # Update the fitnesses
+    scatter, scatter_hof, texts = artists
+    scatter.set_offsets(fitnesses[:, plot_obj])
+    scatter_hof.set_offsets(fitnesses_hof[:, plot_obj])
 
-    # Annotate
+    # Replace annotations
+    for text in texts:
+        text.remove()
+    texts.clear()
     for i in range(fitnesses.shape[0]):
-        ax.text(
-            fitnesses[i, plot_obj[0]],
-            fitnesses[i, plot_obj[1]],
-            str(int(fitnesses[i, -1])),
+        texts.append(
+            ax.text(
+                fitnesses[i, plot_obj[0]],
+                fitnesses[i, plot_obj[1]],
+                str(int(fitnesses[i, -1])),
+            )
         )
     for i in range(fitnesses_hof.shape[0]):
-        ax.text(
-            fitnesses_hof[i, plot_obj[0]],
-            fitnesses_hof[i, plot_obj[1]],
-            str(int(fitnesses_hof[i, -1])),
-            va="top",
+        texts.append(
+            ax.text(
+                fitnesses_hof[i, plot_obj[0]],
+                fitnesses_hof[i, plot_obj[1]],
+                str(int(fitnesses_hof[i, -1])),
+                va="top",
+            )
         )
 
-    # Decorate figure
-    ax.set_xlabel(obj_labels[plot_obj[0]])
-    ax.set_ylabel(obj_labels[plot_obj[1]])
-    ax.grid()
+    # Rescale to new data (relim() doesn't account for scatter plots)
+    ax.ignore_existing_data_limits = True
+    ax.update_datalim(
+        np.concatenate([fitnesses[:, plot_obj], fitnesses_hof[:, plot_obj]])
+    )
+    ax.autoscale_view()
 
     # Update/draw figure
-    ax.relim()
-    ax.autoscale_view()
-    fig.tight_layout()
     if verbose > 1:
-        fig.canvas.draw()
+        fig.canvas.draw_idle()
         fig.canvas.flush_events()
 
-    return fig, ax, True
+    return fig, ax, True, artists
 
 
 def vis_population(population, hof, obj_labels, plot_obj, last=None, verbose=2):
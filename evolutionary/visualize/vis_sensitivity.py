@@ -1,5 +1,3 @@
-from pathlib import Path
-
 import torch
 import numpy as np
 import pandas as pd
@@ -8,14 +6,18 @@ import matplotlib.pyplot as plt
 from pysnn.network import SNNNetwork
 
 from evolutionary.utils.constructors import build_network, build_environment
-from evolutionary.utils.utils import randomize_env, is_pareto_efficient
+from evolutionary.utils.utils import (
+    randomize_env,
+    is_pareto_efficient,
+    find_parameters,
+)
 
 
 def vis_sensitivity_complete(config, parameters, verbose=2):
     # Expand to all parameter files
     # In order to combine multiple evolution runs: put them as subdirectories in one
     # big folder and use that as parameter argument
-    parameters = sorted(Path(parameters).rglob("*.net"))
+    parameters, states = find_parameters(parameters)
     ids = np.arange(0, len(parameters))
     # Save parameters with indices as DataFrame for later identification of good controllers
     pd.DataFrame(
@@ -41,7 +43,7 @@ def vis_sensitivity_complete(config, parameters, verbose=2):
         # Go over all individuals
         for i, param in enumerate(parameters):
             # Load network
-            network.load_state_dict(torch.load(param))
+            network.load_state_dict(states[i])
 
             # Reset env and net (may be superfluous)
             # Also reseed env to make noise equal across runs!
@@ -199,7 +201,7 @@ def vis_sensitivity_complete_4m(config, parameters, verbose=2):
     # Expand to all parameter files
     # In order to combine multiple evolution runs: put them as subdirectories in one
     # big folder and use that as parameter argument
-    parameters = sorted(Path(parameters).rglob("*.net"))
+    parameters, states = find_parameters(parameters)
     ids = np.arange(0, len(parameters))
     # Save parameters with indices as DataFrame for later identification of good controllers
     pd.DataFrame(
@@ -225,7 +227,7 @@ def vis_sensitivity_complete_4m(config, parameters, verbose=2):
         # Go over all individuals
         for i, param in enumerate(parameters):
             # Load network
-            network.load_state_dict(torch.load(param))
+            network.load_state_dict(states[i])
 
             # Reset env and net (may be superfluous)
             # Also reseed env to make noise equal across runs!
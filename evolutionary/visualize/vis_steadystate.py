@@ -6,7 +6,7 @@ from scipy.interpolate import RectBivariateSpline
 from pysnn.network import SNNNetwork
 
 from evolutionary.utils.constructors import build_network, build_environment
-from evolutionary.utils.utils import randomize_env
+from evolutionary.utils.utils import randomize_env, load_parameters
 from evolutionary.visualize.colormap import parula_map
 
 
@@ -17,7 +17,7 @@ def vis_steadystate(config, parameters, verbose=2):
 
     # Load network
     network = build_network(config)
-    network.load_state_dict(torch.load(parameters))
+    network.load_state_dict(load_parameters(parameters))
 
     # Do one run from 5m
     if isinstance(network, SNNNetwork):
@@ -2,7 +2,6 @@ import argparse
 from pathlib import Path
 
 import torch
-import yaml
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -11,6 +10,7 @@ from scipy.stats import mannwhitneyu
 from pysnn.neuron import AdaptiveLIFNeuron
 
 from evolutionary.utils.constructors import build_network
+from evolutionary.utils.utils import find_parameters, load_config
 
 
 def compare_parameters(
@@ -20,22 +20,22 @@ def compare_parameters(
     folder2 = Path(folder2)
     analysis1 = Path(analysis1)
     analysis2 = Path(analysis2)
-    # Glob all network files in subfolders
-    files1 = sorted(folder1.rglob("*.net"))
-    files2 = sorted(folder2.rglob("*.net"))
+    # Glob and load all network parameters in subfolders
+    _, states1 = find_parameters(folder1)
+    _, states2 = find_parameters(folder2)
 
     # Optional (Pareto) filter
     if filter:
         if pareto:
             filter1 = np.load(analysis1 / "mask_pareto.npy")
             filter2 = np.load(analysis2 / "mask_pareto.npy")
-            files1 = np.array(files1)[filter1].tolist()
-            files2 = np.array(files2)[filter2].tolist()
         else:
             filter1 = np.load(analysis1 / "mask.npy")
             filter2 = np.load(analysis2 / "mask.npy")
-            files1 = np.array(files1)[filter1].tolist()
-            files2 = np.array(files2)[filter2].tolist()
+        assert len(states1) == len(filter1), "Filter doesn't match networks"
+        assert len(states2) == len(filter2), "Filter doesn't match networks"
+        states1 = [s for s, keep in zip(states1, filter1) if keep]
+        states2 = [s for s, keep in zip(states2, filter2) if keep]
 
     # Genes we're going to compare
     genes = [
@@ -50,10 +50,8 @@ def compare_parameters(
     ]
 
     # Build network placeholders
-    with open(folder1 / "config.yaml", "r") as cf:
-        config1 = yaml.full_load(cf)
-    with open(folder2 / "config.yaml", "r") as cf:
-        config2 = yaml.full_load(cf)
+    config1 = load_config(folder1 / "config.yaml")
+    config2 = load_config(folder2 / "config.yaml")
     network1 = build_network(config1)
     network2 = build_network(config2)
 
@@ -63,9 +61,9 @@ def compare_parameters(
 
     ### 1 ###
     # Go over networks
-    for file in files1:
+    for state in states1:
         # Load parameters
-        network1.load_state_dict(torch.load(file))
+        network1.load_state_dict(state)
         network1.reset_state()
 
         # Add values to dict
@@ -102,9 +100,9 @@ def compare_parameters(
 
     ### 2 ###
     # Go over networks
-    for file in files2:
+    for state in states2:
         # Load parameters
-        network2.load_state_dict(torch.load(file))
+        network2.load_state_dict(state)
         network2.reset_state()
 
         # Add values to dict
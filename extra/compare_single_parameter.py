@@ -2,36 +2,39 @@ import argparse
 from pathlib import Path
 
 import torch
-import yaml
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 from evolutionary.utils.constructors import build_network
+from evolutionary.utils.utils import find_parameters, load_config
 
 
 def compare_single_parameter(folders, analyses, parameter, filter=False, pareto=False):
     folders = [Path(f) for f in folders]
     analyses = [Path(a) for a in analyses]
 
-    # Glob all network files in subfolders
-    files = [sorted(f.rglob("*.net")) for f in folders]
+    # Glob and load all network parameters in subfolders
+    files = [find_parameters(f)[1] for f in folders]
 
     # Optional (Pareto) filter
     if filter:
         if pareto:
             filters = [np.load(a / "mask_pareto.npy") for a in analyses]
-            files = [np.array(f)[fil].tolist() for f, fil in zip(files, filters)]
         else:
             filters = [np.load(a / "mask.npy") for a in analyses]
-            files = [np.array(f)[fil].tolist() for f, fil in zip(files, filters)]
+        assert all(
+            len(f) == len(fil) for f, fil in zip(files, filters)
+        ), "Filter doesn't match networks"
+        files = [
+            [s for s, keep in zip(f, fil) if keep] for f, fil in zip(files, filters)
+        ]
 
     # Build network placeholders
     networks = []
     for f in folders:
-        with open(f / "config.yaml", "r") as cf:
-            config = yaml.full_load(cf)
-            networks.append(build_network(config))
+        config = load_config(f / "config.yaml")
+        networks.append(build_network(config))
 
     # Dicts to hold everything in an orderly manner
     values = {i: {} for i in range(len(files))}
@@ -40,7 +43,7 @@ def compare_single_parameter(folders, analyses, parameter, filter=False, pareto=
     for i, file, network in zip(range(len(files)), files, networks):
         for f in file:
             # Load parameters
-            network.load_state_dict(torch.load(f))
+            network.load_state_dict(f)
             network.reset_state()
 
             # Add values to dict
@@ -1,5 +1,4 @@
 import argparse
-import yaml
 import os
 import shutil
 from pathlib import Path
@@ -16,6 +15,7 @@ mpl.rcParams["lines.linewidth"] = 0.8
 from pysnn.network import SNNNetwork
 
 from evolutionary.utils.constructors import build_network
+from evolutionary.utils.utils import load_parameters, load_config
 
 
 def plot_ss(folder, parameters, runs):
@@ -33,12 +33,11 @@ def plot_ss(folder, parameters, runs):
         runs = sorted(Path(runs).rglob("run*.csv"))
 
     # Load config
-    with open(folder / "config.yaml", "r") as cf:
-        config = yaml.full_load(cf)
+    config = load_config(folder / "config.yaml")
 
     # Load network
     network = build_network(config)
-    network.load_state_dict(torch.load(parameters))
+    network.load_state_dict(load_parameters(parameters))
     if isinstance(network, SNNNetwork):
         network.reset_state()
 
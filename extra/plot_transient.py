@@ -1,5 +1,4 @@
 import argparse
-import yaml
 import os
 import shutil
 from pathlib import Path
@@ -15,7 +14,7 @@ mpl.rcParams["lines.linewidth"] = 0.8
 from pysnn.network import SNNNetwork
 
 from evolutionary.utils.constructors import build_network, build_environment
-from evolutionary.utils.utils import randomize_env
+from evolutionary.utils.utils import randomize_env, load_parameters, load_config
 
 
 def plot_transient(folder, parameters):
@@ -29,15 +28,14 @@ def plot_transient(folder, parameters):
     os.makedirs(save_folder)
 
     # Load config
-    with open(folder / "config.yaml", "r") as cf:
-        config = yaml.full_load(cf)
+    config = load_config(folder / "config.yaml")
 
     # Build environment
     env = build_environment(config)
 
     # Load network
     network = build_network(config)
-    network.load_state_dict(torch.load(parameters))
+    network.load_state_dict(load_parameters(parameters))
     if isinstance(network, SNNNetwork):
         network.reset_state()
 
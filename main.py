@@ -5,23 +5,35 @@ import time
 import multiprocessing
 import os
 import random
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from itertools import chain
 from shutil import copyfile
 
-import torch
-import yaml
 import numpy as np
 import pandas as pd
 from deap import base, creator, tools
 from deap.benchmarks.tools import convergence, hypervolume
 
-from evolutionary.evaluate.evaluate import evaluate
+from evolutionary.evaluate.evaluate import (
+    init_worker,
+    evaluate_population,
+    evaluate_batch,
+)
 from evolutionary.operators.crossover import crossover_none
 from evolutionary.operators.mutation import mutate_call_network
+from evolutionary.operators.selection import select_nsga2, sort_nondominated
 from evolutionary.utils.constructors import build_network_partial, build_environment
 from evolutionary.utils.model_to_header import model_to_header
-from evolutionary.utils.utils import randomize_env
+from evolutionary.utils.utils import (
+    randomize_env,
+    get_device,
+    save_parameters,
+    copy_state,
+    clone_individual,
+    fitness_stats,
+    load_config,
+)
 from evolutionary.visualize.vis_network import vis_network
 from evolutionary.visualize.vis_performance import vis_performance, vis_disturbance
 from evolutionary.visualize.vis_steadystate import vis_steadystate
@@ -42,17 +54,16 @@ def main(config, verbose):
     # Set last time to start time
     last_time = start_time
 
-    # MP
-    processes = multiprocessing.cpu_count() // 2
-    pool = multiprocessing.Pool(processes=processes)
-
     # Build network
     network = build_network_partial(config)
 
     # Build environments and randomize
+    # Each randomization gets its own independent random stream, spawned from a
+    # single seed sequence (seeded from config if given, else from fresh entropy)
+    seed_seq = np.random.SeedSequence(config["evo"].get("seed"))
     envs = [build_environment(config) for _ in config["env"]["h0"]]
-    for env in envs:
-        randomize_env(env, config)
+    for env, seed in zip(envs, seed_seq.spawn(len(envs))):
+        randomize_env(env, config, np.random.default_rng(seed))
 
     # Objectives
     # Time to land, final height, final velocity, spikes per second
@@ -83,6 +94,16 @@ def main(config, verbose):
     creator.create("Fitness", base.Fitness, weights=config["evo"]["obj weights"])
     creator.create("Individual", list, fitness=creator.Fitness)
 
+    # MP
+    # Workers are initialized with everything that doesn't change between
+    # evaluations, so it isn't sent again with every evaluation
+    processes = multiprocessing.cpu_count() // 2
+    pool = multiprocessing.Pool(
+        processes=processes,
+        initializer=init_worker,
+        initargs=(valid_objectives, config),
+    )
+
     toolbox = base.Toolbox()
     toolbox.register(
         "individual", tools.initRepeat, container=creator.Individual, func=network, n=1
@@ -90,10 +111,7 @@ def main(config, verbose):
     toolbox.register(
         "population", tools.initRepeat, container=list, func=toolbox.individual
     )
-    toolbox.register(
-        "evaluate",
-        partial(evaluate, valid_objectives, config, envs, config["env"]["h0"]),
-    )
+    toolbox.register("clone", clone_individual, network)
     toolbox.register("mate", crossover_none)
     toolbox.register(
         "mutate",
@@ -104,15 +122,34 @@ def main(config, verbose):
             mutation_rate=config["evo"]["mutation rate"],
         ),
     )
-    toolbox.register("select", tools.selNSGA2)
+    toolbox.register("select", select_nsga2)
     toolbox.register("map", pool.map)
 
-    stats = tools.Statistics(lambda ind: ind.fitness.values)
-    stats.register("avg", np.mean, axis=0)
-    stats.register("median", np.median, axis=0)
-    stats.register("std", np.std, axis=0)
-    stats.register("min", np.min, axis=0)
-    stats.register("max", np.max, axis=0)
+    # Evaluate entire population: either all at once in a single batched network
+    # (ANN only), or individual by individual in parallel over the pool
+    if config["net"]["network"] == "ANN" and config["evo"].get("batched", False):
+        toolbox.register(
+            "evaluate_population",
+            partial(
+                evaluate_batch,
+                valid_objectives,
+                config,
+                envs,
+                config["env"]["h0"],
+                device=get_device(),
+            ),
+        )
+    else:
+        # Runtimes vary a lot between individuals, so hand them out one by one to
+        # prevent workers idling while others finish a large chunk
+        # Each worker keeps its own environments, which are only re-seeded once per
+        # generation, so individuals don't all get the same noise (see below)
+        toolbox.register(
+            "evaluate_population",
+            evaluate_population,
+            partial(toolbox.map, chunksize=1),
+            envs,
+        )
 
     logbook = tools.Logbook()
     logbook.header = ("gen", "evals", "avg", "median", "std", "min", "max")
@@ -124,7 +161,7 @@ def main(config, verbose):
     hof = tools.ParetoFront()  # hall of fame!
 
     # Evaluate initial population
-    fitnesses = toolbox.map(toolbox.evaluate, population)
+    fitnesses = toolbox.evaluate_population(population)
     for ind, fit in zip(population, fitnesses):
         ind.fitness.values = fit
 
@@ -136,13 +173,13 @@ def main(config, verbose):
     hof.update(population)
 
     # Log first record
-    record = stats.compile(population)
+    record = fitness_stats(population)
     logbook.record(
         gen=0, evals=len(population), **{k: v.round(2) for k, v in record.items()}
     )
 
     # Log convergence (of first front) and hypervolume
-    pareto_fronts = tools.sortNondominated(population, len(population))
+    pareto_fronts = sort_nondominated(population, len(population))
     current_time = time.time()
     minutes = (current_time - last_time) / 60
     last_time = time.time()
@@ -174,11 +211,16 @@ def main(config, verbose):
             if last[2]:
                 last[0].savefig(f"{config['fig location']}relevant{i}_000.png")
         # Parameters
-        for i, ind in enumerate(hof):
-            torch.save(
-                ind[0].state_dict(),
-                f"{config['log location']}hof_000/individual_{i:03}.net",
+        # Written in the background, so evolution can continue in the meantime
+        # Copies are saved, such that changes to the hall of fame don't interfere
+        saver = ThreadPoolExecutor(max_workers=1)
+        saves = [
+            saver.submit(
+                save_parameters,
+                [copy_state(ind[0]) for ind in hof],
+                f"{config['log location']}hof_000/",
             )
+        ]
         # Fitnesses
         pd.DataFrame(
             [ind.fitness.values for ind in hof], columns=config["evo"]["objectives"]
@@ -190,17 +232,18 @@ def main(config, verbose):
         # Each individual in a generation experiences the same environments,
         # but re-seeding per individual is not done to prevent identically-performing
         # agents (and thus thousands of HOFs, due to stepping nature of SNNs)
-        for env in envs:
-            randomize_env(env, config)
+        for env, seed in zip(envs, seed_seq.spawn(len(envs))):
+            randomize_env(env, config, np.random.default_rng(seed))
 
         # Selection: Pareto front + best of the rest
-        pareto_fronts = tools.sortNondominated(population, len(population))
+        pareto_fronts = sort_nondominated(population, len(population))
         selection = pareto_fronts[0]
-        others = list(chain(*pareto_fronts[1:]))
+        others = list(chain.from_iterable(pareto_fronts[1:]))
         # We need a multiple of 4 for selTournamentDCD()
-        if len(others) % 4:
-            others.extend(random.sample(selection, 4 - (len(others) % 4)))
-        selection.extend(tools.selTournamentDCD(others, len(others)))
+        pad = -len(others) % 4
+        if pad:
+            others += random.sample(selection, pad)
+        selection += tools.selTournamentDCD(others, len(others))
 
         # Get offspring: mutate selection
         # TODO: maybe add crossover? Which is usually done binary,
@@ -211,26 +254,24 @@ def main(config, verbose):
 
         # Re-evaluate last generation/population, because their conditions are random
         # and we want to test each individual against as many as possible
-        fitnesses = toolbox.map(toolbox.evaluate, population)
-        for ind, fit in zip(population, fitnesses):
-            ind.fitness.values = fit
-
         # And evaluate the entire new offspring, for the same reason
-        fitnesses = toolbox.map(toolbox.evaluate, offspring)
-        for ind, fit in zip(offspring, fitnesses):
+        # Do both in a single map, such that there's only one barrier per generation
+        evaluated = population + offspring
+        fitnesses = toolbox.evaluate_population(evaluated)
+        for ind, fit in zip(evaluated, fitnesses):
             ind.fitness.values = fit
 
         # Update the hall of fame with the offspring,
         # so we get the best of population + offspring in there
         # Also include population, because we re-evaluated it
-        hof.update(population + offspring)
+        hof.update(evaluated)
 
         # Select the population for the next generation
         # from the last generation and its offspring
-        population = toolbox.select(population + offspring, config["evo"]["pop size"])
+        population = toolbox.select(evaluated, config["evo"]["pop size"])
 
         # Log stuff, but don't print!
-        record = stats.compile(population)
+        record = fitness_stats(population)
         logbook.record(
             gen=gen,
             evals=len(offspring) + len(population),
@@ -238,7 +279,7 @@ def main(config, verbose):
         )
 
         # Log convergence (of first front) and hypervolume
-        pareto_fronts = tools.sortNondominated(population, len(population))
+        pareto_fronts = sort_nondominated(population, len(population))
         current_time = time.time()
         minutes = (current_time - last_time) / 60
         last_time = time.time()
@@ -277,12 +318,14 @@ def main(config, verbose):
                             f"{config['fig location']}relevant{i}_{gen:03}.png"
                         )
 
-                # Save parameters of hall of fame individuals
-                for i, ind in enumerate(hof):
-                    torch.save(
-                        ind[0].state_dict(),
-                        f"{config['log location']}hof_{gen:03}/individual_{i:03}.net",
+                # Save parameters of hall of fame individuals (all in one file)
+                saves.append(
+                    saver.submit(
+                        save_parameters,
+                        [copy_state(ind[0]) for ind in hof],
+                        f"{config['log location']}hof_{gen:03}/",
                     )
+                )
 
                 # Save fitnesses
                 pd.DataFrame(
@@ -318,6 +361,12 @@ def main(config, verbose):
     # Close multiprocessing pool
     pool.close()
 
+    # Wait for parameters to be saved, raising any errors that occurred
+    if verbose:
+        for save in saves:
+            save.result()
+        saver.shutdown()
+
 
 if __name__ == "__main__":
     # Parse input arguments
@@ -338,8 +387,7 @@ if __name__ == "__main__":
     if args["mode"] == "train":
         # Read config file
         assert args["config"] is not None, "Training needs a configuration file"
-        with open(args["config"], "r") as cf:
-            config = yaml.full_load(cf)
+        config = load_config(args["config"])
 
         # Check if we supplied tags for identification
         assert args["tags"] is not None, "Provide tags for identifying a run!"
@@ -372,8 +420,7 @@ if __name__ == "__main__":
     elif args["mode"] == "test":
         # Read config file
         assert args["config"] is not None, "Testing needs a configuration file"
-        with open(args["config"], "r") as cf:
-            config = yaml.full_load(cf)
+        config = load_config(args["config"])
 
         # Don't create/save in case of debugging
         if args["verbose"]:
@@ -406,8 +453,7 @@ if __name__ == "__main__":
     elif args["mode"] == "analyze":
         # Read config file
         assert args["config"] is not None, "Analysis needs a configuration file"
-        with open(args["config"], "r") as cf:
-            config = yaml.full_load(cf)
+        config = load_config(args["config"])
 
         # Check if folder of parameters was supplied
         assert os.path.isdir(
@@ -437,8 +483,7 @@ if __name__ == "__main__":
     elif args["mode"] == "analyze4m":
         # Read config file
         assert args["config"] is not None, "Analysis needs a configuration file"
-        with open(args["config"], "r") as cf:
-            config = yaml.full_load(cf)
+        config = load_config(args["config"])
 
         # Check if folder of parameters was supplied
         assert os.path.isdir(
@@ -468,8 +513,7 @@ if __name__ == "__main__":
     elif args["mode"] == "save":
         # Read config file
         assert args["config"] is not None, "Saving needs a configuration file"
-        with open(args["config"], "r") as cf:
-            config = yaml.full_load(cf)
+        config = load_config(args["config"])
 
         # Don't create/save in case of debugging
         if args["verbose"]: